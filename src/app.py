@@ -5,12 +5,19 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from urllib.parse import unquote, urlsplit
+import json
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
 
@@ -25,55 +32,55 @@ activities = {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     },
     "Basketball Team": {
         "description": "Competitive basketball with regular practices and games",
         "schedule": "Mondays and Wednesdays, 4:00 PM - 6:00 PM",
         "max_participants": 15,
-        "participants": ["alex@mergington.edu", "sarah@mergington.edu"]
+        "participants": {"alex@mergington.edu", "sarah@mergington.edu"}
     },
     "Soccer Club": {
         "description": "Learn soccer skills and participate in friendly matches",
         "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
         "max_participants": 25,
-        "participants": ["carlos@mergington.edu", "maya@mergington.edu"]
+        "participants": {"carlos@mergington.edu", "maya@mergington.edu"}
     },
     "Art Club": {
         "description": "Explore various art mediums including painting, drawing, and sculpture",
         "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
         "max_participants": 18,
-        "participants": ["lily@mergington.edu", "ryan@mergington.edu"]
+        "participants": {"lily@mergington.edu", "ryan@mergington.edu"}
     },
     "Drama Club": {
         "description": "Theater performances, acting workshops, and stage production",
         "schedule": "Mondays and Fridays, 3:30 PM - 5:30 PM",
         "max_participants": 22,
-        "participants": ["grace@mergington.edu", "ethan@mergington.edu"]
+        "participants": {"grace@mergington.edu", "ethan@mergington.edu"}
     },
     "Debate Team": {
         "description": "Develop critical thinking and public speaking skills through competitive debates",
         "schedule": "Thursdays, 3:30 PM - 5:00 PM",
         "max_participants": 16,
-        "participants": ["noah@mergington.edu", "ava@mergington.edu"]
+        "participants": {"noah@mergington.edu", "ava@mergington.edu"}
     },
     "Science Olympiad": {
         "description": "Compete in various science and engineering challenges",
         "schedule": "Tuesdays, 3:30 PM - 5:00 PM",
         "max_participants": 20,
-        "participants": ["lucas@mergington.edu", "zoe@mergington.edu"]
+        "participants": {"lucas@mergington.edu", "zoe@mergington.edu"}
     }
 }
 
@@ -85,7 +92,11 @@ def root():
 
 @app.get("/activities")
 def get_activities():
-    return activities
+    # Participants are stored as sets; serialize them as sorted lists
+    return {
+        name: {**details, "participants": sorted(details["participants"])}
+        for name, details in activities.items()
+    }
 
 
 @app.post("/activities/{activity_name}/signup")
@@ -103,7 +114,7 @@ def signup_for_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student already signed up for this activity")
     
     # Add student
-    activity["participants"].append(email)
+    activity["participants"].add(email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
@@ -124,3 +135,94 @@ def unregister_from_activity(activity_name: str, email: str):
     # Remove student
     activity["participants"].remove(email)
     return {"message": f"Unregistered {email} from {activity_name}"}
+
+
+class BatchSubRequest(BaseModel):
+    id: str
+    method: str
+    url: str
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+
+async def dispatch_subrequest(sub_request: BatchSubRequest):
+    """Run a single sub-request through the app and capture its response"""
+    url = urlsplit(sub_request.url)
+    body = b"" if sub_request.body is None else json.dumps(sub_request.body).encode()
+    headers = [(b"content-type", b"application/json")] if body else []
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub_request.method.upper(),
+        "scheme": "http",
+        "path": unquote(url.path),
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "server": ("batch", 80),
+        "client": None,
+        "batch_subrequest": True,
+    }
+    request_sent = False
+    status = 500
+    response_headers = []
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            # Keep headers as [name, value] pairs; repeats such as set-cookie must not be folded
+            response_headers.extend(
+                [name.decode("latin-1"), value.decode("latin-1")]
+                for name, value in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # Report the failure for this sub-request without losing the others
+        logger.exception("batch sub-request %s failed", sub_request.id)
+        return {
+            "id": sub_request.id,
+            "status": 500,
+            "headers": [],
+            "body": {"detail": "Internal Server Error"},
+        }
+
+    content = b"".join(chunks)
+    try:
+        response_body = json.loads(content) if content else None
+    except ValueError:
+        response_body = content.decode(errors="replace")
+    return {"id": sub_request.id, "status": status, "headers": response_headers, "body": response_body}
+
+
+@app.post("/batch")
+async def batch(batch_request: BatchRequest, request: Request):
+    """Run several API requests in a single round trip, in order"""
+    # Validate this batch is not itself a sub-request of another batch
+    if request.scope.get("batch_subrequest"):
+        raise HTTPException(status_code=400, detail="Nested batch requests are not supported")
+
+    # Validate no sub-request targets the batch endpoint itself, as the router sees the path
+    for sub_request in batch_request.requests:
+        if unquote(urlsplit(sub_request.url).path).rstrip("/") == "/batch":
+            raise HTTPException(status_code=400, detail="Nested batch requests are not supported")
+
+    responses = [await dispatch_subrequest(sub_request) for sub_request in batch_request.requests]
+    return {"responses": responses}
@@ -2,29 +2,95 @@
 Pytest configuration and shared fixtures for the Mergington High School Activities API tests.
 """
 
+import asyncio
+import json
+import pickle
+from urllib.parse import quote, unquote, urlsplit
+
+import httpx
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from src.app import app, activities
-import copy
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+    """
+    Create a test client for the FastAPI app, shared across the session.
+    Entering the client runs app startup/shutdown once rather than per test.
+    """
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    """Create an async client that dispatches directly to the ASGI app."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
 
 
-@pytest.fixture(scope="function")
-def reset_activities():
+@pytest.fixture(scope="session")
+def run_get():
     """
-    Reset activities data before each test to ensure clean state.
-    This fixture automatically restores the original activities data after each test.
+    Return a helper that drives a GET straight through the ASGI app.
+    Skips the TestClient thread portal and reuses one event loop for the session;
+    returns the status code and decoded JSON body (None when the body is empty).
+    """
+    loop = asyncio.new_event_loop()
+
+    async def get(url):
+        path, query = urlsplit(url)[2:4]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": quote(unquote(path)).encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [],
+            "server": ("testserver", 80),
+            "client": None,
+        }
+        response = {"status": None, "body": b""}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await app(scope, receive, send)
+        body = response["body"]
+        return response["status"], json.loads(body) if body else None
+
+    yield lambda path: loop.run_until_complete(get(path))
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def activities_baseline():
+    """Serialize the original activities data once per session for cheap restores."""
+    return pickle.dumps(activities, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.fixture(autouse=True, scope="function")
+def reset_activities(activities_baseline):
+    """
+    Restore activities data after each test to ensure clean state.
+    This fixture runs for every test and, on teardown, rebuilds the original activities
+    from the session baseline; inner dicts and participant sets are replaced, not reused.
     """
-    # Store original activities
-    original_activities = copy.deepcopy(activities)
-    
     yield
     
-    # Restore original activities after test
+    # Restore original activities from the session baseline
     activities.clear()
-    activities.update(original_activities)
\ No newline at end of file
+    activities.update(pickle.loads(activities_baseline))
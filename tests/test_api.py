@@ -8,185 +8,287 @@ Tests all API endpoints including:
 """
 
 import pytest
+from fastapi.responses import JSONResponse
+
+from src.app import activities, app, BatchSubRequest, dispatch_subrequest
+
+SIGNUP_URL = "/activities/{}/signup"
+UNREGISTER_URL = "/activities/{}/unregister"
 
 
 class TestGetActivities:
     """Test cases for GET /activities endpoint."""
     
-    def test_get_activities_success(self, client, reset_activities):
+    def test_get_activities_success(self, run_get):
         """Test successful retrieval of all activities."""
-        response = client.get("/activities")
+        status_code, data = run_get("/activities")
         
-        assert response.status_code == 200
-        data = response.json()
+        assert status_code == 200
         
         # Check that we get a dictionary of activities
         assert isinstance(data, dict)
         assert len(data) > 0
         
         # Check structure of first activity
-        first_activity = list(data.values())[0]
+        first_activity = next(iter(data.values()))
         assert "description" in first_activity
         assert "schedule" in first_activity
         assert "max_participants" in first_activity
         assert "participants" in first_activity
         assert isinstance(first_activity["participants"], list)
     
-    def test_get_activities_returns_all_expected_activities(self, client, reset_activities):
+    def test_get_activities_returns_all_expected_activities(self, run_get):
         """Test that all expected activities are returned."""
-        response = client.get("/activities")
-        data = response.json()
+        _, data = run_get("/activities")
         
         # Check for some expected activities
         expected_activities = ["Chess Club", "Programming Class", "Gym Class"]
         for activity in expected_activities:
             assert activity in data
+    
+    def test_get_activities_returns_sorted_participants(self, client, run_get):
+        """Test that participants are returned as a sorted list, not in signup order."""
+        activity_name = "Chess Club"
+        email = "aaron@mergington.edu"  # Sorts before the existing participants
+        
+        response = client.post(SIGNUP_URL.format(activity_name), params={"email": email})
+        assert response.status_code == 200
+        
+        _, data = run_get("/activities")
+        participants = data[activity_name]["participants"]
+        assert isinstance(participants, list)
+        assert participants[0] == email
+        assert participants == sorted(participants)
 
 
 class TestSignupForActivity:
     """Test cases for POST /activities/{activity_name}/signup endpoint."""
     
-    def test_signup_success(self, client, reset_activities):
+    def test_signup_success(self, client):
         """Test successful signup for an activity."""
         activity_name = "Chess Club"
         email = "test@mergington.edu"
         
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = client.post(SIGNUP_URL.format(activity_name), params={"email": email})
         
         assert response.status_code == 200
         data = response.json()
         assert data["message"] == f"Signed up {email} for {activity_name}"
         
         # Verify the participant was added
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity_name]["participants"]
-    
-    def test_signup_nonexistent_activity(self, client, reset_activities):
-        """Test signup for a non-existent activity."""
-        activity_name = "Nonexistent Club"
-        email = "test@mergington.edu"
-        
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
-        
-        assert response.status_code == 404
-        data = response.json()
-        assert data["detail"] == "Activity not found"
+        assert email in activities[activity_name]["participants"]
     
-    def test_signup_duplicate_registration(self, client, reset_activities):
+    def test_signup_duplicate_registration(self, client):
         """Test attempting to sign up twice for the same activity."""
         activity_name = "Chess Club"
         email = "michael@mergington.edu"  # Already registered in test data
         
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = client.post(SIGNUP_URL.format(activity_name), params={"email": email})
         
         assert response.status_code == 400
         data = response.json()
         assert data["detail"] == "Student already signed up for this activity"
     
-    def test_signup_multiple_different_activities(self, client, reset_activities):
+    def test_signup_multiple_different_activities(self, client):
         """Test signing up for multiple different activities."""
         email = "test@mergington.edu"
         activities_to_signup = ["Chess Club", "Programming Class"]
         
-        for activity_name in activities_to_signup:
-            response = client.post(f"/activities/{activity_name}/signup?email={email}")
-            assert response.status_code == 200
+        response = client.post("/batch", json={"requests": [
+            {"id": activity_name, "method": "POST", "url": f"/activities/{activity_name}/signup?email={email}"}
+            for activity_name in activities_to_signup
+        ]})
+        assert response.status_code == 200
+        for sub_response in response.json()["responses"]:
+            assert sub_response["status"] == 200
         
         # Verify participant is in both activities
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        
         for activity_name in activities_to_signup:
-            assert email in activities_data[activity_name]["participants"]
+            assert email in activities[activity_name]["participants"]
 
 
 class TestUnregisterFromActivity:
     """Test cases for DELETE /activities/{activity_name}/unregister endpoint."""
     
-    def test_unregister_success(self, client, reset_activities):
+    def test_unregister_success(self, client):
         """Test successful unregistration from an activity."""
         activity_name = "Chess Club"
         email = "michael@mergington.edu"  # Already registered in test data
         
-        # Verify participant is initially registered
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity_name]["participants"]
-        
-        # Unregister
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        response = client.delete(UNREGISTER_URL.format(activity_name), params={"email": email})
         
         assert response.status_code == 200
         data = response.json()
         assert data["message"] == f"Unregistered {email} from {activity_name}"
         
         # Verify participant was removed
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email not in activities_data[activity_name]["participants"]
-    
-    def test_unregister_nonexistent_activity(self, client, reset_activities):
-        """Test unregistration from a non-existent activity."""
-        activity_name = "Nonexistent Club"
-        email = "test@mergington.edu"
-        
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
-        
-        assert response.status_code == 404
-        data = response.json()
-        assert data["detail"] == "Activity not found"
+        assert email not in activities[activity_name]["participants"]
     
-    def test_unregister_not_registered_participant(self, client, reset_activities):
+    def test_unregister_not_registered_participant(self, client):
         """Test unregistration of a participant who is not registered."""
         activity_name = "Chess Club"
         email = "notregistered@mergington.edu"
         
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        response = client.delete(UNREGISTER_URL.format(activity_name), params={"email": email})
         
         assert response.status_code == 400
         data = response.json()
         assert data["detail"] == "Student is not registered for this activity"
     
-    def test_signup_then_unregister_cycle(self, client, reset_activities):
+    @pytest.mark.asyncio
+    async def test_signup_then_unregister_cycle(self, async_client):
         """Test the full cycle: signup -> unregister -> signup again."""
         activity_name = "Programming Class"
         email = "test@mergington.edu"
         
         # Initial signup
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = await async_client.post(SIGNUP_URL.format(activity_name), params={"email": email})
         assert response.status_code == 200
         
         # Verify registration
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity_name]["participants"]
+        assert email in activities[activity_name]["participants"]
         
         # Unregister
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        response = await async_client.delete(UNREGISTER_URL.format(activity_name), params={"email": email})
         assert response.status_code == 200
         
         # Verify unregistration
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email not in activities_data[activity_name]["participants"]
+        assert email not in activities[activity_name]["participants"]
         
         # Register again (should work)
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = await async_client.post(SIGNUP_URL.format(activity_name), params={"email": email})
         assert response.status_code == 200
         
         # Final verification
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity_name]["participants"]
+        assert email in activities[activity_name]["participants"]
+
+
+class TestNonexistentActivity:
+    """Test cases for signup/unregister against an activity that does not exist."""
+    
+    @pytest.mark.parametrize("method, url", [("post", SIGNUP_URL), ("delete", UNREGISTER_URL)])
+    def test_nonexistent_activity(self, client, method, url):
+        """Test signup and unregistration for a non-existent activity."""
+        activity_name = "Nonexistent Club"
+        email = "test@mergington.edu"
+        
+        response = getattr(client, method)(url.format(activity_name), params={"email": email})
+        
+        assert response.status_code == 404
+        data = response.json()
+        assert data["detail"] == "Activity not found"
+
+
+class TestBatch:
+    """Test cases for POST /batch endpoint."""
+    
+    def test_batch_runs_requests_in_order(self, client):
+        """Test that sub-requests run in order and report their own results."""
+        activity_name = "Chess Club"
+        email = "test@mergington.edu"
+        
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "POST", "url": f"/activities/{activity_name}/signup?email={email}"},
+            {"id": "2", "method": "POST", "url": f"/activities/{activity_name}/signup?email={email}"},
+            {"id": "3", "method": "DELETE", "url": f"/activities/{activity_name}/unregister?email={email}"},
+        ]})
+        
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert [r["id"] for r in responses] == ["1", "2", "3"]
+        assert [r["status"] for r in responses] == [200, 400, 200]
+        assert responses[0]["body"]["message"] == f"Signed up {email} for {activity_name}"
+        assert responses[1]["body"]["detail"] == "Student already signed up for this activity"
+        assert email not in activities[activity_name]["participants"]
+    
+    def test_batch_returns_sub_response_headers(self, client):
+        """Test that each sub-response carries its headers, e.g. a redirect location."""
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "GET", "url": "/"},
+        ]})
+        
+        assert response.status_code == 200
+        sub_response = response.json()["responses"][0]
+        assert sub_response["status"] == 307
+        assert ["location", "/static/index.html"] in sub_response["headers"]
+    
+    def test_batch_keeps_repeated_headers_separate(self, client, monkeypatch):
+        """Test that repeated headers like set-cookie are not folded into one value."""
+        def set_two_cookies():
+            response = JSONResponse({})
+            response.set_cookie("first", "1")
+            response.set_cookie("second", "2")
+            return response
+        monkeypatch.setattr(app.router, "routes", list(app.router.routes))
+        app.add_api_route("/test-cookies", set_two_cookies)
+        
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "GET", "url": "/test-cookies"},
+        ]})
+        
+        assert response.status_code == 200
+        cookies = [value for name, value in response.json()["responses"][0]["headers"] if name == "set-cookie"]
+        assert len(cookies) == 2
+        assert cookies[0].startswith("first=1")
+        assert cookies[1].startswith("second=2")
+    
+    def test_batch_reports_unhandled_error_per_sub_request(self, client, monkeypatch, caplog):
+        """Test that an unhandled error in one sub-request does not lose the others."""
+        email = "test@mergington.edu"
+        monkeypatch.setitem(activities["Chess Club"], "participants", None)
+        
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "POST", "url": f"/activities/Programming Class/signup?email={email}"},
+            {"id": "2", "method": "POST", "url": f"/activities/Chess Club/signup?email={email}"},
+            {"id": "3", "method": "POST", "url": f"/activities/Gym Class/signup?email={email}"},
+        ]})
+        
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert [r["status"] for r in responses] == [200, 500, 200]
+        assert responses[1]["body"]["detail"] == "Internal Server Error"
+        assert "batch sub-request 2 failed" in caplog.text
+        assert email in activities["Programming Class"]["participants"]
+        assert email in activities["Gym Class"]["participants"]
+    
+    def test_batch_rejects_nested_batch(self, client):
+        """Test that a batch cannot contain another batch request."""
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "POST", "url": "/batch", "body": {"requests": []}},
+        ]})
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["detail"] == "Nested batch requests are not supported"
+    
+    @pytest.mark.asyncio
+    async def test_batch_rejects_being_run_as_a_sub_request(self):
+        """Test that the batch endpoint refuses to run inside another batch's sub-request."""
+        result = await dispatch_subrequest(
+            BatchSubRequest(id="1", method="POST", url="/batch", body={"requests": []})
+        )
+        
+        assert result["status"] == 400
+        assert result["body"]["detail"] == "Nested batch requests are not supported"
+    
+    def test_batch_rejects_percent_encoded_nested_batch(self, client):
+        """Test that a percent-encoded path to the batch endpoint is also rejected."""
+        response = client.post("/batch", json={"requests": [
+            {"id": "1", "method": "POST", "url": "/%62atch", "body": {"requests": []}},
+        ]})
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["detail"] == "Nested batch requests are not supported"
 
 
 class TestRootEndpoint:
     """Test cases for root endpoint."""
     
-    def test_root_redirect(self, client):
+    def test_root_redirect(self):
         """Test that root endpoint redirects to static HTML."""
-        response = client.get("/", follow_redirects=False)
+        route = next(route for route in app.routes if getattr(route, "path", None) == "/")
+        response = route.endpoint()
         assert response.status_code == 307  # Temporary redirect
         assert "/static/index.html" in response.headers["location"]
 
@@ -194,52 +296,50 @@ class TestRootEndpoint:
 class TestDataIntegrity:
     """Test cases for data integrity and edge cases."""
     
-    def test_participant_count_accuracy(self, client, reset_activities):
+    def test_participant_count_accuracy(self, client):
         """Test that participant counts are accurate after operations."""
         activity_name = "Basketball Team"
         test_emails = ["test1@mergington.edu", "test2@mergington.edu", "test3@mergington.edu"]
         
         # Get initial count
-        initial_response = client.get("/activities")
-        initial_data = initial_response.json()
-        initial_count = len(initial_data[activity_name]["participants"])
+        initial_count = len(activities[activity_name]["participants"])
         
-        # Add participants
-        for email in test_emails:
-            response = client.post(f"/activities/{activity_name}/signup?email={email}")
-            assert response.status_code == 200
+        # Add participants in a single batch
+        response = client.post("/batch", json={"requests": [
+            {"id": email, "method": "POST", "url": f"/activities/{activity_name}/signup?email={email}"}
+            for email in test_emails
+        ]})
+        assert response.status_code == 200
+        for sub_response in response.json()["responses"]:
+            assert sub_response["status"] == 200
         
         # Check count after additions
-        response = client.get("/activities")
-        data = response.json()
-        assert len(data[activity_name]["participants"]) == initial_count + len(test_emails)
+        assert len(activities[activity_name]["participants"]) == initial_count + len(test_emails)
         
         # Remove one participant
-        response = client.delete(f"/activities/{activity_name}/unregister?email={test_emails[0]}")
+        response = client.delete(UNREGISTER_URL.format(activity_name), params={"email": test_emails[0]})
         assert response.status_code == 200
         
         # Check final count
-        response = client.get("/activities")
-        data = response.json()
-        assert len(data[activity_name]["participants"]) == initial_count + len(test_emails) - 1
-        assert test_emails[0] not in data[activity_name]["participants"]
-        assert test_emails[1] in data[activity_name]["participants"]
-        assert test_emails[2] in data[activity_name]["participants"]
+        participants = activities[activity_name]["participants"]
+        assert len(participants) == initial_count + len(test_emails) - 1
+        assert test_emails[0] not in participants
+        assert test_emails[1] in participants
+        assert test_emails[2] in participants
     
-    def test_email_parameter_encoding(self, client, reset_activities):
+    @pytest.mark.asyncio
+    async def test_email_parameter_encoding(self, async_client):
         """Test handling of special characters in email parameters."""
         activity_name = "Art Club"
         email = "test.special@mergington.edu"  # Using dot instead of plus to avoid URL encoding issues
         
         # Signup with special characters
-        response = client.post(f"/activities/{activity_name}/signup?email={email}")
+        response = await async_client.post(SIGNUP_URL.format(activity_name), params={"email": email})
         assert response.status_code == 200
         
         # Verify registration
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity_name]["participants"]
+        assert email in activities[activity_name]["participants"]
         
         # Unregister with special characters
-        response = client.delete(f"/activities/{activity_name}/unregister?email={email}")
+        response = await async_client.delete(UNREGISTER_URL.format(activity_name), params={"email": email})
         assert response.status_code == 200
\ No newline at end of file